@@ -1,217 +1,460 @@
-import unittest
+import functools
+import math
+import os
+from statistics import NormalDist
 import numpy as np
-from qiskit import QuantumCircuit, transpile
-from qiskit_aer import AerSimulator
-from qiskit.visualization import plot_histogram
-
-class TestGutBaryogenesis(unittest.TestCase):
-    """Test class for GUT baryogenesis quantum circuit simulation."""
-    
-    def create_initial_state(self, x_boson=1, quark=0, lepton=0, antiquark=0, antilepton=0):
-        """Create the initial state with specified particle configuration."""
-        # Create a 5-qubit system
-        # Qubit 0: X boson
-        # Qubit 1: quark (0=none, 1=present)
-        # Qubit 2: antiquark (0=none, 1=present)
-        # Qubit 3: lepton (0=none, 1=present)
-        # Qubit 4: antilepton (0=none, 1=present)
-        
-        qc = QuantumCircuit(5)
-        
-        # Set X boson
-        if x_boson:
-            qc.x(0)
-        
-        # Set quark or antiquark
-        if quark:
-            qc.x(1)
-        if antiquark:
-            qc.x(2)
-            
-        # Set lepton or antilepton
-        if lepton:
-            qc.x(3)
-        if antilepton:
-            qc.x(4)
-            
-        return qc
-    
-    def create_gut_decay_circuit(self, epsilon=0.1):
-        """Create a circuit that models X boson decay with CP violation."""
-        # Calculate probabilities based on CP violation
-        # X → q + l with probability (1+epsilon)/2
-        # X → q̄ + l̄ with probability (1-epsilon)/2
-        
-        p_ql = (1 + epsilon)/2
-        p_qlbar = (1 - epsilon)/2
-        
-        # Convert probabilities to rotation angles
-        theta = 2 * np.arcsin(np.sqrt(p_ql))
-        
-        # Create the circuit
-        qc = QuantumCircuit(5)
-        
-        # First, create a superposition of quark+lepton vs antiquark+antilepton
-        # based on the CP violation parameter
-        qc.cry(theta, 0, 1)  # Rotate quark based on epsilon
-        
-        # Now ensure lepton follows quark (they must be created together)
-        qc.cx(1, 3)  # If quark is created, lepton must be created
-        
-        # If no quark was created, then we need antiquark+antilepton
-        # Use a NOT on quark to determine this
+import pytest
+
+# Qiskit and Aer are imported inside the functions that use them, so that
+# collecting the tests does not pay for loading them
+
+# Transpiled decay circuits are kept here as QPY files between test sessions.
+# Bump _QPY_CACHE_VERSION whenever the circuit construction changes.
+_QPY_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+_QPY_CACHE_VERSION = 4
+
+# Set FLIQ_FAST=1 to sample the CP violation shots from their exact closed form
+# instead of Aer. Tests that check the circuit itself still run Qiskit and Aer.
+FLIQ_FAST = os.environ.get('FLIQ_FAST', '0') == '1'
+
+# Outcome format is |antilepton, lepton, antiquark, quark, X>, so qubit n is
+# bit n of the outcome read as a binary integer
+_X_BIT = 0b00001
+_QUARK_BIT = 0b00010
+_ANTIQUARK_BIT = 0b00100
+_LEPTON_BIT = 0b01000
+_ANTILEPTON_BIT = 0b10000
+
+# Every 5-qubit outcome, grouped by which particles it contains
+_OUTCOMES = [f'{i:05b}' for i in range(32)]
+_X_KEYS = frozenset(k for i, k in enumerate(_OUTCOMES) if i & _X_BIT)
+_QUARK_KEYS = frozenset(k for i, k in enumerate(_OUTCOMES) if i & _QUARK_BIT)
+_ANTIQUARK_KEYS = frozenset(k for i, k in enumerate(_OUTCOMES) if i & _ANTIQUARK_BIT)
+_LEPTON_KEYS = frozenset(k for i, k in enumerate(_OUTCOMES) if i & _LEPTON_BIT)
+_ANTILEPTON_KEYS = frozenset(k for i, k in enumerate(_OUTCOMES) if i & _ANTILEPTON_BIT)
+
+# Decayed outcomes that are not q+l or q̄+l̄
+_NON_CONSERVING_KEYS = (frozenset(_OUTCOMES) - _X_KEYS) & (
+    (_QUARK_KEYS - _LEPTON_KEYS)
+    | (_QUARK_KEYS & _ANTIQUARK_KEYS)
+    | (_QUARK_KEYS & _ANTILEPTON_KEYS)
+    | (_ANTIQUARK_KEYS - _ANTILEPTON_KEYS)
+    | (_ANTIQUARK_KEYS & _LEPTON_KEYS)
+)
+
+# CP violation parameters and the expected sign of the resulting asymmetry
+CP_CASES = [(0.2, +1), (0.0, 0), (-0.2, -1)]
+# Resolution required on the measured asymmetry. The shot count keeps the
+# confidence interval on P(quark) within CP_DELTA/2 either side, which is
+# CP_DELTA on the asymmetry.
+CP_DELTA = 0.05
+# Confidence level of the interval that must contain P(quark) = (1+epsilon)/2
+CP_CONFIDENCE = 0.9999
+# Seed for the shot sampling in the CP tests, so any failure can be reproduced
+CP_SEED = 1234
+
+
+@functools.lru_cache(maxsize=None)
+def _simulator():
+    """Return the one simulator shared by every test instead of one per run.
+
+    The circuits are tiny and noiseless, so fix the method and skip thread
+    pools and gate fusion.
+    """
+    from qiskit_aer import AerSimulator
+
+    return AerSimulator(
+        method='statevector',
+        max_parallel_threads=1,
+        max_parallel_experiments=1,
+        fusion_enable=False,
+    )
+
+
+def create_initial_state(x_boson=1, quark=0, lepton=0, antiquark=0, antilepton=0):
+    """Create the initial state with specified particle configuration."""
+    # Create a 5-qubit system
+    # Qubit 0: X boson
+    # Qubit 1: quark (0=none, 1=present)
+    # Qubit 2: antiquark (0=none, 1=present)
+    # Qubit 3: lepton (0=none, 1=present)
+    # Qubit 4: antilepton (0=none, 1=present)
+    from qiskit import QuantumCircuit
+
+    qc = QuantumCircuit(5)
+
+    # Set X boson
+    if x_boson:
+        qc.x(0)
+
+    # Set quark or antiquark
+    if quark:
         qc.x(1)
-        qc.cx(1, 2)  # Create antiquark if quark was not created
-        qc.cx(1, 4)  # Create antilepton if quark was not created
-        qc.x(1)  # Restore quark state
-        
-        # X boson is annihilated after decay
-        # If either decay happened, the X boson should be gone
-        qc.cx(1, 0)  # If quark is created, X is annihilated
-        qc.cx(2, 0)  # If antiquark is created, X is annihilated
-        qc.x(0)      # Flip the X boson qubit (now X=0 means it has decayed)
-        
-        return qc
-    
-    def run_gut_simulation(self, epsilon=0.1, num_shots=1000):
-        """Run the GUT baryogenesis simulation and return results."""
-        # Create the initial state
-        qc = self.create_initial_state(x_boson=1)
-        
-        # Add the decay circuit
-        decay_circuit = self.create_gut_decay_circuit(epsilon)
-        qc = qc.compose(decay_circuit)
-        
-        # Measure all qubits
-        qc.measure_all()
-        
-        # Run the simulation
-        simulator = AerSimulator()
-        transpiled_qc = transpile(qc, simulator)
-        job = simulator.run(transpiled_qc, shots=num_shots)
-        result = job.result()
-        counts = result.get_counts()
-        
-        return counts, qc
-    
-    def analyze_gut_results(self, counts):
-        """
-        Analyze the results to calculate baryon asymmetry.
-        
-        Parameters:
-        -----------
-        counts : dict
-            Result counts from the simulation
-        
-        Returns:
-        --------
-        asymmetry : float
-            The baryon asymmetry (N_q - N_qbar)/(N_q + N_qbar)
-        quark_count : int
-            Number of quarks produced
-        antiquark_count : int
-            Number of antiquarks produced
-        """
-        quark_count = 0
-        antiquark_count = 0
-        
-        # Format is |antilepton, lepton, antiquark, quark, X>
-        for outcome, count in counts.items():
-            # Check if quark exists (4th bit from right is 1)
-            if outcome[-2] == '1':
-                quark_count += count
-            
-            # Check if antiquark exists (3rd bit from right is 1)
-            if outcome[-3] == '1':
-                antiquark_count += count
-        
-        total = quark_count + antiquark_count
-        if total > 0:
-            asymmetry = (quark_count - antiquark_count) / total
-        else:
-            asymmetry = 0
-            
-        return asymmetry, quark_count, antiquark_count
-    
-    def test_initial_state(self):
-        """Test that the initial state has X boson and nothing else."""
-        qc = self.create_initial_state(x_boson=1)
-        qc.measure_all()
-        
-        simulator = AerSimulator()
-        result = simulator.run(qc).result()
-        counts = result.get_counts()
-        
-        # Should have X boson (rightmost bit = 1) and nothing else
-        self.assertTrue('00001' in counts)
-        self.assertEqual(len(counts), 1)  # Only one outcome should be possible
-    
-    def test_cp_violation_asymmetry(self):
-        """Test that CP violation parameter creates the expected asymmetry."""
-        # Test with epsilon = 0.2 (strong CP violation)
-        epsilon = 0.2
-        counts, _ = self.run_gut_simulation(epsilon=epsilon, num_shots=10000)
-        asymmetry, quark_count, antiquark_count = self.analyze_gut_results(counts)
-        
-        # Asymmetry should be approximately epsilon (within reasonable statistical fluctuation)
-        # For 10000 runs, we expect to be within about 0.05 of the true value
-        self.assertAlmostEqual(asymmetry, epsilon, delta=0.05)
-        
-        # Total quarks and antiquarks should be non-zero
-        self.assertGreater(quark_count + antiquark_count, 0)
-        
+    if antiquark:
+        qc.x(2)
+
+    # Set lepton or antilepton
+    if lepton:
+        qc.x(3)
+    if antilepton:
+        qc.x(4)
+
+    return qc
+
+
+def create_gut_decay_circuit(epsilon=0.1):
+    """Create a circuit that models X boson decay with CP violation."""
+    from qiskit import QuantumCircuit
+
+    qc = QuantumCircuit(5)
+    append_gut_decay(qc, epsilon)
+    return qc
+
+
+def append_gut_decay(qc, epsilon=0.1):
+    """Append the X boson decay gates to an existing 5-qubit circuit in place.
+
+    The circuit must start with only the X boson present (qubit 0 set and the
+    other qubits empty). The final X on qubit 0 annihilates the boson
+    unconditionally, and antiquark and antilepton are created by flipping empty
+    qubits, so any other starting state gives unphysical outcomes.
+    """
+    # CP violation sets the decay branching ratios
+    # X → q + l with probability (1+epsilon)/2
+    # X → q̄ + l̄ with probability (1-epsilon)/2
+    theta = _decay_angle(epsilon)
+
+    # First, create a superposition of quark+lepton vs antiquark+antilepton
+    # based on the CP violation parameter
+    qc.cry(theta, 0, 1)  # Rotate quark based on epsilon
+
+    # Now ensure lepton follows quark (they must be created together)
+    qc.cx(1, 3)  # If quark is created, lepton must be created
+
+    # If no quark was created, then we need antiquark+antilepton
+    # Antiquark and antilepton start empty, so copying the quark and then
+    # flipping leaves them set exactly when no quark was created
+    qc.cx(1, 2)
+    qc.cx(1, 4)
+    qc.x(2)  # Create antiquark if quark was not created
+    qc.x(4)  # Create antilepton if quark was not created
+
+    # X boson is annihilated after decay
+    # Every run decays into one of the two channels, so no control is needed
+    qc.x(0)  # X=0 means it has decayed
+
+
+def run_gut_simulation(epsilon=0.1, num_shots=1000, rng=None):
+    """
+    Run the GUT baryogenesis simulation and return results.
+
+    Parameters:
+    -----------
+    rng : numpy.random.Generator, optional
+        Generator used to sample the shots; a fresh unseeded one by default
+
+    Returns:
+    --------
+    counts : dict
+        Bitstring counts over ``num_shots`` shots
+    qc : QuantumCircuit
+        The measured decay circuit, ready to run on any backend. The
+        simulation itself samples shots from Aer's exact probabilities
+        instead of running this circuit.
+    """
+    # Built fresh on every call so callers can modify it freely
+    qc = _build_full_circuit(epsilon)
+    qc.measure_all()
+
+    # The closed-form sampler needs neither Aer nor a transpiled circuit
+    if FLIQ_FAST:
+        return _simulate_analytically(epsilon, num_shots, rng), qc
+
+    # Transpilation is cached per epsilon
+    transpiled_qc = _get_transpiled(round(epsilon, 9))
+
+    # Run the simulation once for the exact distribution, then sample the shots
+    job = _simulator().run(transpiled_qc, shots=1)
+    result = job.result()
+    counts = _sample_counts(result, num_shots, rng)
+
+    return counts, qc
+
+
+def analyze_gut_results(counts):
+    """
+    Analyze the results to calculate baryon asymmetry.
+
+    Parameters:
+    -----------
+    counts : dict
+        Result counts from the simulation
+
+    Returns:
+    --------
+    asymmetry : float
+        The baryon asymmetry (N_q - N_qbar)/(N_q + N_qbar)
+    quark_count : int
+        Number of quarks produced
+    antiquark_count : int
+        Number of antiquarks produced
+    """
+    # Parse each outcome once and test particles with bit masks
+    outcomes = [(int(outcome, 2), count) for outcome, count in counts.items()]
+    quark_count = sum(count for outcome, count in outcomes if outcome & _QUARK_BIT)
+    antiquark_count = sum(count for outcome, count in outcomes if outcome & _ANTIQUARK_BIT)
+
+    total = quark_count + antiquark_count
+    if total > 0:
+        asymmetry = (quark_count - antiquark_count) / total
+    else:
+        asymmetry = 0
+
+    return asymmetry, quark_count, antiquark_count
+
+
+def _decay_angle(epsilon):
+    """CRY angle that creates the quark with probability (1+epsilon)/2.
+
+    ``2*arcsin(sqrt((1+epsilon)/2))`` simplifies to ``pi/2 + arcsin(epsilon)``.
+    """
+    return math.pi/2 + math.asin(epsilon)
+
+
+def _build_full_circuit(epsilon):
+    """Build the full decay circuit on a single QuantumCircuit.
+
+    The decay gates are appended to the initial state in place rather than
+    composed from a second circuit, which would copy the whole circuit. No
+    measurements are added; shots are sampled from the exact probabilities.
+    """
+    qc = create_initial_state(x_boson=1)
+    append_gut_decay(qc, epsilon)
+
+    return qc
+
+
+@functools.lru_cache(maxsize=32)
+def _get_transpiled(epsilon_key):
+    """Build and transpile the full decay circuit once per epsilon.
+
+    Returns the transpiled circuit, ending in an Aer ``save_probabilities_dict``
+    instruction. It is shared by every caller, so it must only be run, never
+    modified. Callers pass ``round(epsilon, 9)`` so that float noise does not
+    defeat the cache. The circuit is also stored as QPY under ``.cache/``, so
+    later test sessions load it instead of rebuilding and transpiling.
+    """
+    import qiskit
+    import qiskit_aer
+    from qiskit import qpy, transpile
+    from qiskit_aer.library import SaveProbabilitiesDict
+
+    path = os.path.join(
+        _QPY_CACHE_DIR,
+        f'gut_decay_{epsilon_key!r}_v{_QPY_CACHE_VERSION}'
+        f'_qiskit{qiskit.__version__}_aer{qiskit_aer.__version__}.qpy',
+    )
+    try:
+        with open(path, 'rb') as f:
+            transpiled_qc, = qpy.load(f)
+    except Exception:
+        # Missing, truncated, corrupt or written by an incompatible Qiskit;
+        # any failure to load just means the circuit is rebuilt
+        qc = _build_full_circuit(epsilon_key)
+
+        # The circuit is a handful of gates already in Aer's basis, so the
+        # optimization passes cost more than they could save
+        transpiled_qc = transpile(qc, _simulator(), optimization_level=0)
+
+        # Write to a temporary file first so concurrent sessions never read a
+        # partially written cache entry. A read-only checkout just skips caching.
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(_QPY_CACHE_DIR, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                qpy.dump(transpiled_qc, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    # QPY loads Aer save instructions back as plain Instructions that Aer
+    # cannot run, so only the gates are cached and the save is appended here
+    save = SaveProbabilitiesDict(transpiled_qc.num_qubits, label='probabilities')
+    transpiled_qc.append(save, transpiled_qc.qubits)
+
+    return transpiled_qc
+
+
+def _simulate_analytically(epsilon, num_shots, rng=None):
+    """Sample decay outcomes without running a simulator.
+
+    The decay circuit is deterministic apart from a single Bernoulli outcome:
+    X → q + l with probability (1+epsilon)/2, otherwise X → q̄ + l̄. The counts
+    are therefore one binomial draw, keyed with the same bitstrings Aer returns.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    n_q = int(rng.binomial(num_shots, (1 + epsilon)/2))
+    n_qbar = num_shots - n_q
+
+    # Format is |antilepton, lepton, antiquark, quark, X>
+    counts = {}
+    if n_q:
+        counts['01010'] = n_q
+    if n_qbar:
+        counts['10100'] = n_qbar
+    return counts
+
+
+def _sample_counts(result, num_shots, rng=None, experiment=0, num_qubits=5):
+    """Sample bitstring counts from the probabilities saved by Aer.
+
+    The circuit is noiseless, so one multinomial draw over the exact
+    ``{outcome: probability}`` dict replaces Aer's per-shot sampling. Only
+    outcomes that were drawn are returned, as in Aer's own counts.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    probs = result.data(experiment)['probabilities']
+    sampled = rng.multinomial(num_shots, list(probs.values()))
+    return {
+        format(outcome, f'0{num_qubits}b'): int(count)
+        for outcome, count in zip(probs.keys(), sampled)
+        if count
+    }
+
+
+def _possible_outcomes(epsilon):
+    """Bitstrings with nonzero probability in Aer's exact output distribution."""
+    result = _simulator().run(_get_transpiled(round(epsilon, 9)), shots=1).result()
+    probs = result.data(0)['probabilities']
+    return {format(outcome, '05b') for outcome, prob in probs.items() if prob > 0}
+
+
+def _shots_for_interval(half_width, confidence, epsilon):
+    """Smallest shot count whose exact binomial interval is ``half_width`` wide.
+
+    The interval is the Clopper-Pearson interval at ``confidence`` around
+    P(quark) = (1+epsilon)/2. The normal approximation gives a starting point
+    slightly below the answer, which is then stepped up to the exact value.
+    """
+    from scipy.stats import binomtest
+
+    p_quark = (1 + epsilon)/2
+    z = NormalDist().inv_cdf((1 + confidence)/2)
+    num_shots = math.ceil((z/half_width)**2 * p_quark*(1 - p_quark))
+    while True:
+        ci = binomtest(round(p_quark*num_shots), num_shots, p_quark).proportion_ci(
+            confidence_level=confidence
+        )
+        if (ci.high - ci.low)/2 <= half_width:
+            return num_shots
+        num_shots += 1
+
+
+def _run_batched(epsilons, num_shots, rng=None):
+    """Simulate several epsilon values and return ``{epsilon: counts}``.
+
+    All circuits are submitted to Aer in a single ``run`` call, so the
+    simulator is launched once for the whole batch.
+    """
+    if FLIQ_FAST:
+        return {eps: _simulate_analytically(eps, num_shots, rng) for eps in epsilons}
+
+    transpiled = [_get_transpiled(round(eps, 9)) for eps in epsilons]
+    result = _simulator().run(transpiled, shots=1).result()
+    return {eps: _sample_counts(result, num_shots, rng, i) for i, eps in enumerate(epsilons)}
+
+
+@pytest.fixture(scope='module')
+def sim_results():
+    """Counts for every CP violation case, simulated in one batched run."""
+    epsilons = [epsilon for epsilon, _ in CP_CASES]
+    # Enough shots for the hardest case in the batch
+    num_shots = max(_shots_for_interval(CP_DELTA/2, CP_CONFIDENCE, eps) for eps in epsilons)
+    return _run_batched(epsilons, num_shots=num_shots, rng=np.random.default_rng(CP_SEED))
+
+
+def test_initial_state():
+    """Test that the initial state has X boson and nothing else."""
+    from qiskit.quantum_info import Statevector
+
+    # The state is deterministic, so check the amplitudes instead of sampling
+    sv = Statevector.from_instruction(create_initial_state(x_boson=1))
+
+    # Should have X boson (rightmost bit = 1) and nothing else
+    assert abs(sv.data[0b00001]) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize('epsilon,sign', CP_CASES)
+def test_cp_violation(epsilon, sign, sim_results):
+    """Test that the CP violation parameter creates the expected asymmetry."""
+    from scipy.stats import binomtest
+
+    _, quark_count, antiquark_count = analyze_gut_results(sim_results[epsilon])
+
+    # Total quarks and antiquarks should be non-zero
+    assert quark_count + antiquark_count > 0
+
+    # The circuit creates a quark with probability exactly (1+epsilon)/2, so the
+    # exact binomial confidence interval for the observed quark fraction must
+    # contain it. The shot count keeps that interval within CP_DELTA/2 either
+    # side, so this bounds the asymmetry error by CP_DELTA.
+    p_quark = (1 + epsilon)/2
+    ci = binomtest(quark_count, quark_count + antiquark_count, p_quark).proportion_ci(
+        confidence_level=CP_CONFIDENCE
+    )
+    assert ci.low <= p_quark <= ci.high
+
+    if sign > 0:
         # More quarks than antiquarks with positive epsilon
-        self.assertGreater(quark_count, antiquark_count)
-    
-    def test_zero_cp_violation(self):
-        """Test that zero CP violation produces no asymmetry."""
-        epsilon = 0.0
-        counts, _ = self.run_gut_simulation(epsilon=epsilon, num_shots=10000)
-        asymmetry, quark_count, antiquark_count = self.analyze_gut_results(counts)
-        
-        # Asymmetry should be approximately zero (within statistical fluctuation)
-        self.assertAlmostEqual(asymmetry, 0.0, delta=0.05)
-        
-        # Quarks and antiquarks should be roughly equal
-        self.assertAlmostEqual(quark_count / (quark_count + antiquark_count), 0.5, delta=0.05)
-    
-    def test_negative_cp_violation(self):
-        """Test that negative CP violation produces negative asymmetry."""
-        epsilon = -0.2
-        counts, _ = self.run_gut_simulation(epsilon=epsilon, num_shots=10000)
-        asymmetry, quark_count, antiquark_count = self.analyze_gut_results(counts)
-        
-        # Asymmetry should be approximately epsilon (within reasonable statistical fluctuation)
-        self.assertAlmostEqual(asymmetry, epsilon, delta=0.05)
-        
+        assert quark_count > antiquark_count
+    elif sign < 0:
         # More antiquarks than quarks with negative epsilon
-        self.assertGreater(antiquark_count, quark_count)
-    
-    def test_conservation_laws(self):
-        """Test that baryon and lepton numbers are conserved in each decay."""
-        counts, _ = self.run_gut_simulation(num_shots=10000)
-        
-        # Format is |antilepton, lepton, antiquark, quark, X>
-        for outcome, count in counts.items():
-            # Skip cases where X boson still exists
-            if outcome[-1] == '1':
-                continue
-                
-            has_quark = outcome[-2] == '1'
-            has_antiquark = outcome[-3] == '1'
-            has_lepton = outcome[-4] == '1'
-            has_antilepton = outcome[-5] == '1'
-            
-            # If decay happened, it should be q+l or qbar+lbar
-            if has_quark:
-                self.assertTrue(has_lepton, f"Found quark without lepton in outcome {outcome}")
-                self.assertFalse(has_antiquark, f"Found quark with antiquark in outcome {outcome}")
-                self.assertFalse(has_antilepton, f"Found quark with antilepton in outcome {outcome}")
-            
-            if has_antiquark:
-                self.assertTrue(has_antilepton, f"Found antiquark without antilepton in outcome {outcome}")
-                self.assertFalse(has_quark, f"Found antiquark with quark in outcome {outcome}")
-                self.assertFalse(has_lepton, f"Found antiquark with lepton in outcome {outcome}")
+        assert antiquark_count > quark_count
+
+
+def test_decay_circuit_matches_composed():
+    """Test that appending the decay in place matches composing the decay circuit."""
+    from qiskit.quantum_info import Statevector
+
+    epsilon = 0.1
+    composed = create_initial_state(x_boson=1).compose(create_gut_decay_circuit(epsilon))
+
+    assert Statevector.from_instruction(_build_full_circuit(epsilon)).equiv(
+        Statevector.from_instruction(composed)
+    )
+
+
+@pytest.mark.parametrize('fast', [False, True])
+def test_run_gut_simulation(fast, monkeypatch):
+    """Test both simulation paths against the circuit's exact outcomes."""
+    monkeypatch.setitem(globals(), 'FLIQ_FAST', fast)
+    epsilon = 0.2
+
+    counts, qc = run_gut_simulation(epsilon, num_shots=1000, rng=np.random.default_rng(CP_SEED))
+
+    # Every sampled outcome, including the closed-form sampler's hardcoded
+    # keys, must be one the circuit can actually produce
+    assert sum(counts.values()) == 1000
+    assert set(counts) <= _possible_outcomes(epsilon)
+
+    # The returned circuit measures every qubit so it can run on any backend
+    assert qc.count_ops().get('measure') == qc.num_qubits
+
+
+def test_conservation_laws():
+    """Test that baryon and lepton numbers are conserved in each decay."""
+    # This is a structural check on the circuit, so it uses Aer's exact
+    # probabilities rather than sampled shots, even under FLIQ_FAST
+    possible = _possible_outcomes(0.1)
+
+    # Decayed outcomes must be q+l or q̄+l̄; outcomes with the X boson still
+    # present are not checked
+    bad_outcomes = sorted(_NON_CONSERVING_KEYS & possible)
+    assert not bad_outcomes, f"Found outcomes violating conservation laws: {bad_outcomes}"
+
 
 if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+    raise SystemExit(pytest.main([__file__]))